@@ -1,21 +1,68 @@
 import argparse
 import enum
-import json
-import objectrest
+import functools
+import orjson
 import os
 import requests
-import time
 from abc import abstractmethod, ABC
-from pydantic import BaseModel
-from typing import Optional
+from collections import defaultdict
+from datetime import datetime
+from geolib import geohash as geohash_lib
+from pydantic import AfterValidator, BaseModel, TypeAdapter, field_validator
+from requests.adapters import HTTPAdapter
+from typing import Annotated, Optional
 from urllib.parse import quote
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
 
 MESHMAPPER_REPEATERS_URL = "https://den.meshmapper.net/repeaters.json"  # Only repeaters in Denver
 LETSMESH_NODES_URL = "https://api.letsmesh.net/api/nodes?region=DEN"  # All devices in Denver
+USER_AGENT = "MeshCore-DEN-Sync/1.0"
+GEOHASH_PRECISION = 7  # ~150m cells, stored per node
+GEOHASH_INDEX_PRECISION = 5  # ~5km cells, used to bucket nodes for proximity queries
+
+
+def _build_session() -> requests.Session:
+    """
+    Build a shared HTTP session so all outbound calls reuse pooled keep-alive connections.
+    :return: A configured requests Session.
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': ACCEPT_ENCODING,  # Also advertises br/zstd when urllib3's brotli/zstd extras are installed
+    })
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=3, backoff_factor=0.3))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_SESSION = _build_session()
+
+
+def _get_content(url: str, **kwargs) -> bytes:
+    """
+    Fetch a URL on the shared session and return the decompressed response body as raw bytes.
+    The body is streamed straight out of urllib3, so no decoded text copy of the payload is ever built.
+    :param url: The URL to fetch.
+    :type url: str
+    :param kwargs: Additional keyword arguments to pass to requests.
+    :return: The decompressed response body.
+    :rtype: bytes
+    """
+    with _SESSION.get(url, stream=True, **kwargs) as res:
+        res.raise_for_status()
+        return res.raw.read(decode_content=True)
 
 
 ### Generic models
 
+# Public keys are hex strings; normalise them to uppercase once at parse time so comparisons don't have to
+PublicKey = Annotated[str, AfterValidator(str.upper)]
+
+
 class NodeType(enum.Enum):
     """
     Enum representing the type of given node, used throughout the logic here
@@ -60,10 +107,11 @@ class Node(BaseNode):
     Internal representation of a generic node.
     Used for processing and comparing nodes from multiple API sources.
     """
-    public_key: str
+    public_key: PublicKey
     name: str
     latitude: Optional[float] = None
     longitude: Optional[float] = None
+    geohash: Optional[str] = None
     node_type: NodeType
     is_observer: bool = False
     contact: str | None
@@ -88,7 +136,7 @@ class Node(BaseNode):
         :return: The first two bytes of the public key as a hex string, in uppercase.
         :rtype: str
         """
-        return self.public_key[:4].upper()
+        return self.public_key[:4]
 
     @property
     def public_key_id_2_char(self) -> str:
@@ -98,12 +146,12 @@ class Node(BaseNode):
         :return: The first byte of the public key as a hex string, in uppercase.
         :rtype: str
         """
-        return self.public_key[:2].upper()
+        return self.public_key[:2]
 
-    @property
+    @functools.cached_property
     def hash(self) -> int:
         """
-        Generate a hash value for this node
+        Generate a hash value for this node, computed once and cached on the instance
         :return: An integer hash value representing this node.
         """
         _input = f"{self.name}:{self.public_key_id}:{self.node_type.value}:{self.latitude}:{self.longitude}:{self.is_observer}"
@@ -119,6 +167,7 @@ class Node(BaseNode):
             'name': self.name,
             'latitude': self.latitude,
             'longitude': self.longitude,
+            'geohash': self.geohash,
             'node_type': self.node_type.value,
             'is_observer': self.is_observer,
             'contact': self.contact,
@@ -131,16 +180,25 @@ class Node(BaseNode):
 
 class MeshMapperRepeater(BaseModel):
     id: str
-    hex_id: str
+    hex_id: PublicKey
     name: str
     lat: float
     lon: float
     last_heard: int  # Unix timestamp
-    created_at: str  # Unix timestamp as string
+    created_at: int = 0  # Unix timestamp, sent by the API as a string
     enabled: int
     power: str
     iata: str
 
+    @field_validator("created_at", mode="before")
+    @classmethod
+    def _parse_created_at(cls, value):
+        if isinstance(value, int):
+            return value
+        if isinstance(value, str) and value.isdigit():
+            return int(value)
+        return 0
+
 
 ### LetsMesh-specific models for parsing API responses
 
@@ -187,7 +245,7 @@ class LetsMeshNode(BaseModel):
     """
     Represents a node as returned by the LetsMesh API.
     """
-    public_key: str
+    public_key: PublicKey
     name: str
     device_role: LetsMeshNodeRole
     regions: list[str]
@@ -197,29 +255,41 @@ class LetsMeshNode(BaseModel):
     location: Optional[LetsMeshNodeLocation] = None
 
 
+class LetsMeshNodesResponse(BaseModel):
+    """
+    Represents the top-level response of the LetsMesh nodes API.
+    """
+    nodes: list[LetsMeshNode]
+
+
+_MESHMAPPER_REPEATERS_ADAPTER = TypeAdapter(list[MeshMapperRepeater])
+
+
+@functools.lru_cache(maxsize=1)
 def _get_letsmesh_nodes() -> list[LetsMeshNode]:
     """
     Fetch nodes from the LetsMesh API for the Denver region and return them as a list of LetsMeshNode objects.
+    The response is cached for the lifetime of the process, so repeated callers share a single fetch.
     :return: A list of LetsMeshNode objects representing the nodes in the Denver region.
     :rtype: list[LetsMeshNode]
     """
-    return objectrest.get_object(url=LETSMESH_NODES_URL,  # type: ignore
-                                 model=LetsMeshNode,
-                                 extract_list=True,
-                                 sub_keys=["nodes"],
-                                 headers={
-                                     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                                     'Accept-Language': 'en-US,en;q=0.9',
-                                     'DNT': '1',
-                                     'Alt-Used': 'api.letsmesh.net',
-                                     'Connection': 'keep-alive',
-                                     'Upgrade-Insecure-Requests': '1',
-                                     'Sec-Fetch-Dest': 'document',
-                                     'Sec-Fetch-Mode': 'navigate',
-                                     'Sec-Fetch-Site': 'none',
-                                     'Sec-Fetch-User': '?1',
-                                     'Priority': 'u=0, i',
-                                 })
+    content = _get_content(LETSMESH_NODES_URL,
+                           timeout=10,
+                           headers={
+                               'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                               'Accept-Language': 'en-US,en;q=0.9',
+                               'DNT': '1',
+                               'Alt-Used': 'api.letsmesh.net',
+                               'Connection': 'keep-alive',
+                               'Upgrade-Insecure-Requests': '1',
+                               'Sec-Fetch-Dest': 'document',
+                               'Sec-Fetch-Mode': 'navigate',
+                               'Sec-Fetch-Site': 'none',
+                               'Sec-Fetch-User': '?1',
+                               'Priority': 'u=0, i',
+                           })
+    # Parse and validate straight from the raw bytes in pydantic-core, without an intermediate dict
+    return LetsMeshNodesResponse.model_validate_json(content).nodes
 
 
 def _get_meshmapper_repeaters() -> list[MeshMapperRepeater]:
@@ -228,9 +298,7 @@ def _get_meshmapper_repeaters() -> list[MeshMapperRepeater]:
     :return: A list of MeshMapperRepeater objects representing the repeaters in the Denver region.
     :rtype: list[MeshMapperRepeater]
     """
-    return objectrest.get_object(url=MESHMAPPER_REPEATERS_URL,  # type: ignore
-                                 model=MeshMapperRepeater,
-                                 extract_list=True)
+    return _MESHMAPPER_REPEATERS_ADAPTER.validate_json(_get_content(MESHMAPPER_REPEATERS_URL, timeout=10))
 
 
 def _get_city_name(lat, lon):
@@ -238,9 +306,10 @@ def _get_city_name(lat, lon):
         return None
 
     try:
-        headers = {'User-Agent': 'MeshCore-DEN-Sync/1.0'}
         url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}&zoom=18"
-        data = objectrest.get_json(url=url, headers=headers, timeout=10)
+        res = _SESSION.get(url, timeout=10)
+        res.raise_for_status()
+        data = res.json()
         address = data.get('address', {})
         return (
                 address.get('neighbourhood')  # Most specific
@@ -260,7 +329,7 @@ def _meshmapper_node_is_room(node: MeshMapperRepeater, letsmesh_nodes: list[Lets
     # but if there's a LetsMesh node with the same public key and it's a room server,
     # we can infer that this MeshMapper node is also a room server
     for lm_node in letsmesh_nodes:
-        if lm_node.public_key.upper() == node.hex_id.upper():
+        if lm_node.public_key == node.hex_id:
             return lm_node.device_role == LetsMeshNodeRole.ROOM
 
     return False
@@ -268,7 +337,14 @@ def _meshmapper_node_is_room(node: MeshMapperRepeater, letsmesh_nodes: list[Lets
 
 def _build_contact_url(name: str, public_key: str) -> str:
     encoded_name = quote(name)
-    return f"meshcore://contact/add?name={encoded_name}&public_key={public_key.upper()}&type=2"
+    return f"meshcore://contact/add?name={encoded_name}&public_key={public_key}&type=2"
+
+
+def _encode_geohash(lat: Optional[float], lon: Optional[float]) -> Optional[str]:
+    if lat is None or lon is None:
+        return None
+
+    return geohash_lib.encode(lat, lon, GEOHASH_PRECISION)
 
 
 def _iso8601_to_unix_timestamp(iso_str: str) -> int:
@@ -277,8 +353,7 @@ def _iso8601_to_unix_timestamp(iso_str: str) -> int:
 
     try:
         # e.g. 2026-02-18T01:19:00.379Z
-        dt = time.strptime(iso_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-        return int(time.mktime(dt))
+        return int(datetime.fromisoformat(iso_str).timestamp())
     except Exception as e:
         return 0
 
@@ -297,10 +372,11 @@ def get_den_repeaters() -> list[Node]:
             name=repeater.name,
             latitude=repeater.lat,
             longitude=repeater.lon,
+            geohash=_encode_geohash(lat=repeater.lat, lon=repeater.lon),
             node_type=NodeType.ROOM_OR_REPEATER,
             is_observer=False,  # Unknown
             contact=_build_contact_url(name=repeater.name, public_key=repeater.hex_id),
-            created_at=int(repeater.created_at) if repeater.created_at.isdigit() else 0,
+            created_at=repeater.created_at,
             last_heard=repeater.last_heard,
         )
         for repeater in meshmapper_repeaters
@@ -320,6 +396,7 @@ def get_den_companions() -> list[Node]:
             name=node.name,
             latitude=node.location.latitude if node.location else None,
             longitude=node.location.longitude if node.location else None,
+            geohash=_encode_geohash(lat=node.location.latitude, lon=node.location.longitude) if node.location else None,
             node_type=node.device_role.to_node_type,
             is_observer=not node.is_mqtt_connected,
             contact=_build_contact_url(name=node.name, public_key=node.public_key),
@@ -332,6 +409,11 @@ def get_den_companions() -> list[Node]:
     ]
 
 
+_RESERVED_PUBLIC_KEY_ID_PREFIXES_2_CHAR = frozenset({"00", "FF"})  # Reserved by LetsMesh/MeshMapper
+# ref: https://ottawamesh.ca/deployment/repeaters-intercity/
+_RESERVED_PUBLIC_KEY_ID_PREFIXES_1_CHAR = frozenset({"A"})  # A-block reserved by DenverMesh for future use
+
+
 def is_reserved_public_key_id(public_key_id: str) -> bool:
     """
     Check if a public key ID is reserved.
@@ -340,14 +422,11 @@ def is_reserved_public_key_id(public_key_id: str) -> bool:
     :return: True if the public key ID is reserved, False otherwise.
     :rtype: bool
     """
-    if public_key_id[:2].upper() in ["00", "FF"]:  # Reserved by LetsMesh/MeshMapper
-        return True
-
-    # ref: https://ottawamesh.ca/deployment/repeaters-intercity/
-    if public_key_id[:1].upper() in ['A']:  # A-block reserved by DenverMesh for future use
-        return True
-
-    return False
+    prefix = public_key_id[:2].upper()
+    return (
+            prefix in _RESERVED_PUBLIC_KEY_ID_PREFIXES_2_CHAR
+            or prefix[:1] in _RESERVED_PUBLIC_KEY_ID_PREFIXES_1_CHAR
+    )
 
 
 def are_same_node(node_1: Node, node_2: Node) -> bool:
@@ -357,68 +436,98 @@ def are_same_node(node_1: Node, node_2: Node) -> bool:
     :param node_2: The second node to compare.
     :return: True if the nodes are the same, False otherwise.
     """
-    if node_1.public_key.upper() == node_2.public_key.upper():
+    if node_1.public_key == node_2.public_key:
         return True
 
     return False
 
 
+def build_geohash_index(nodes: list[Node]) -> dict[str, list[Node]]:
+    """
+    Bucket nodes by the prefix of their geohash, for fast proximity queries.
+    Nodes without a location are skipped.
+    :param nodes: The list of nodes to index.
+    :return: A dictionary mapping geohash prefixes to the nodes within that cell.
+    """
+    index: dict[str, list[Node]] = defaultdict(list)
+    for node in nodes:
+        if node.geohash:
+            index[node.geohash[:GEOHASH_INDEX_PRECISION]].append(node)
+    return index
+
+
+def get_nearby_nodes(node: Node, geohash_index: dict[str, list[Node]]) -> list[Node]:
+    """
+    Get all nodes in the same or an adjacent geohash cell as the given node.
+    :param node: The node to find neighbours for.
+    :param geohash_index: An index built with build_geohash_index.
+    :return: A list of nearby nodes, excluding the given node itself.
+    """
+    if not node.geohash:
+        return []
+
+    cell = node.geohash[:GEOHASH_INDEX_PRECISION]
+    nearby = []
+    for neighbour_cell in (cell, *geohash_lib.neighbours(cell)):
+        for other in geohash_index.get(neighbour_cell, []):
+            if not are_same_node(node, other):
+                nearby.append(other)
+    return nearby
+
+
 def _read_nodes_from_file(file_path: str) -> list[Node]:
     nodes = []
     if not os.path.exists(file_path):
         return nodes
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        _data = json.load(f)
+    with open(file_path, "rb") as f:
+        _data = orjson.loads(f.read())
         for item in _data:
+            # The cache is written by us from already-validated nodes, so skip re-validation
+            item['node_type'] = NodeType.from_int(item['node_type'])
+            item['public_key'] = item['public_key'].upper()  # model_construct skips the PublicKey normalisation
+            if 'geohash' not in item:  # Cache written before geohashes were stored
+                item['geohash'] = _encode_geohash(lat=item.get('latitude'), lon=item.get('longitude'))
             nodes.append(
-                Node(**item)
+                Node.model_construct(**item)
             )
     return nodes
 
 
-def _filter_diff_nodes(existing_nodes: list[Node], new_nodes: list[Node]) -> tuple[list[Node], list[Node], list[Node]]:
+def _filter_diff_nodes(existing_nodes: list[Node], new_nodes: list[Node]) -> tuple[list[Node], list[Node], list[Node], list[Node]]:
     """
-    Filter nodes into three categories:
+    Filter nodes into four categories, matching nodes by public key:
     1) New nodes that are in new_nodes but not in existing_nodes
-    2) Duplicate nodes that are in both existing_nodes and new_nodes
-    3) Missing nodes that are in existing_nodes and not in new_nodes (potentially removed nodes)
+    2) Changed nodes that are in both existing_nodes and new_nodes, but whose metadata differs
+    3) Duplicate nodes that are in both existing_nodes and new_nodes, with identical metadata
+    4) Missing nodes that are in existing_nodes and not in new_nodes (potentially removed nodes)
     :param existing_nodes: The list of existing nodes to compare against.
     :param new_nodes: The list of new nodes to compare with existing nodes.
-    :return: A tuple containing three lists: (new_nodes_list, duplicate_nodes_list, missing_nodes_list)
+    :return: A tuple containing four lists: (new_nodes_list, changed_nodes_list, duplicate_nodes_list, missing_nodes_list)
     """
-    all_nodes = {}
-
-    existing_node_hash_map = {}
-    new_node_hash_map = {}
-
-    # Loop through the "existing" nodes to build a map of hashes of their identifiers
-    # and store all nodes in a combined map for easy lookup
-    for node in existing_nodes:
-        _hash = node.hash
-        existing_node_hash_map[_hash] = _hash
-        all_nodes[_hash] = node
-
-    # Loop through the "new" nodes to build a map of hashes of their identifiers
-    # and store all nodes in a combined map for easy lookup
-    for node in new_nodes:
-        _hash = node.hash
-        new_node_hash_map[_hash] = _hash
-        all_nodes[_hash] = node
-
-    # Prepare sets
-    existing_nodes_set = set(existing_node_hash_map.items())
-    new_nodes_set = set(new_node_hash_map.items())
-
-    true_new_nodes = new_nodes_set - existing_nodes_set
-    duplicate_nodes = new_nodes_set & existing_nodes_set
-    missing_nodes = existing_nodes_set - new_nodes_set
+    # Map each node's public key to the node, so identity is separate from the (mutable) metadata hash
+    existing_nodes_by_key: dict[str, Node] = {node.public_key: node for node in existing_nodes}
+    new_nodes_by_key: dict[str, Node] = {node.public_key: node for node in new_nodes}
+
+    true_new_nodes = new_nodes_by_key.keys() - existing_nodes_by_key.keys()
+    common_nodes = new_nodes_by_key.keys() & existing_nodes_by_key.keys()
+    missing_nodes = existing_nodes_by_key.keys() - new_nodes_by_key.keys()
+
+    changed_nodes = []
+    duplicate_nodes = []
+    for key in common_nodes:
+        node = new_nodes_by_key[key]
+        if node.hash == existing_nodes_by_key[key].hash:
+            duplicate_nodes.append(node)
+        else:
+            changed_nodes.append(node)
 
-    # Look up the actual Node objects for each category based on the hashes and return them as lists
+    # Look up the actual Node objects for each category based on the public keys and return them as lists
     return (
-        list(all_nodes[_hash] for _hash, _ in true_new_nodes),
-        list(all_nodes[_hash] for _hash, _ in duplicate_nodes),
-        list(all_nodes[_hash] for _hash, _ in missing_nodes),
+        [new_nodes_by_key[key] for key in true_new_nodes],
+        changed_nodes,
+        duplicate_nodes,
+        [existing_nodes_by_key[key] for key in missing_nodes],
     )
 
 
@@ -430,15 +539,15 @@ def sync_repeaters(storage_file_path: str) -> None:
     existing_repeaters: list[Node] = _read_nodes_from_file(file_path=storage_file_path)
     print(f"Loaded {len(existing_repeaters)} known repeaters from cache")
 
-    new, duplicate, missing = _filter_diff_nodes(existing_nodes=existing_repeaters, new_nodes=repeaters)
+    new, changed, duplicate, missing = _filter_diff_nodes(existing_nodes=existing_repeaters, new_nodes=repeaters)
     print(
-        f"Found {len(new)} new repeaters, {len(duplicate)} duplicate repeaters, and {len(missing)} missing repeaters compared to cache")
+        f"Found {len(new)} new repeaters, {len(changed)} changed repeaters, {len(duplicate)} duplicate repeaters, and {len(missing)} missing repeaters compared to cache")
 
-    if new or missing:
+    if new or changed or missing:
         # Write ALL repeaters to file
         print("Updating cache with new repeaters...")
-        with open(storage_file_path, "w", encoding="utf-8") as f:
-            f.write(json.dumps([node.to_json() for node in repeaters], ensure_ascii=False, indent=2))
+        with open(storage_file_path, "wb") as f:
+            f.write(orjson.dumps([node.to_json() for node in repeaters], option=orjson.OPT_INDENT_2))
         print("Cache updated.")
     else:
         print("No changes detected, cache not updated.")
@@ -452,15 +561,15 @@ def sync_companions(storage_file_path: str) -> None:
     existing_companions: list[Node] = _read_nodes_from_file(file_path=storage_file_path)
     print(f"Loaded {len(existing_companions)} known companions from cache")
 
-    new, duplicate, missing = _filter_diff_nodes(existing_nodes=existing_companions, new_nodes=companions)
+    new, changed, duplicate, missing = _filter_diff_nodes(existing_nodes=existing_companions, new_nodes=companions)
     print(
-        f"Found {len(new)} new companions, {len(duplicate)} duplicate companions, and {len(missing)} missing companions compared to cache")
+        f"Found {len(new)} new companions, {len(changed)} changed companions, {len(duplicate)} duplicate companions, and {len(missing)} missing companions compared to cache")
 
-    if new or missing:
+    if new or changed or missing:
         # Write ALL repeaters to file
         print("Updating cache with new repeaters...")
-        with open(storage_file_path, "w", encoding="utf-8") as f:
-            f.write(json.dumps([node.to_json() for node in companions], ensure_ascii=False, indent=2))
+        with open(storage_file_path, "wb") as f:
+            f.write(orjson.dumps([node.to_json() for node in companions], option=orjson.OPT_INDENT_2))
         print("Cache updated.")
     else:
         print("No changes detected, cache not updated.")
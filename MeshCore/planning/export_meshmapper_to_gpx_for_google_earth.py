@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 
-# pip install objectrest pydantic
+# pip install requests pydantic
 # python3 ./export_meshmapper_to_gpx_for_google_earth.py "repeaters.gpx"
 
-import objectrest
-from pydantic import BaseModel
+import requests
+from pydantic import BaseModel, TypeAdapter
 import argparse
+from xml.sax.saxutils import escape
 
 DATA_URL = "https://den.meshmapper.net/api.php?request=repeaters"
 GPX_CREATOR_NAME = "MeshMapper GPX Exporter"
@@ -28,20 +29,18 @@ class Repeater(BaseModel):
 
 
 def _download_repeaters() -> list[Repeater]:
-    return objectrest.get_object(url=DATA_URL, model=Repeater, extract_list=True)
+    res = requests.get(DATA_URL, timeout=30)
+    res.raise_for_status()
+    return TypeAdapter(list[Repeater]).validate_json(res.content)
 
 def _generate_gpx_entry(repeater: Repeater) -> str:
-    return f'<wpt lat="{repeater.lat}" lon="{repeater.lon}"><name>{repeater.name}</name><desc>Power: {repeater.power}, Last Heard: {repeater.last_heard}</desc></wpt>'
+    return f'<wpt lat="{repeater.lat}" lon="{repeater.lon}"><name>{escape(repeater.name)}</name><desc>Power: {escape(repeater.power)}, Last Heard: {repeater.last_heard}</desc></wpt>'
 
 def _export_to_gpx(repeaters: list[Repeater]) -> str:
-    gpx = f'<?xml version="1.0" encoding="UTF-8" standalone="no"?><gpx version="{GPX_VERSION}" creator="{GPX_CREATOR_NAME}"><metadata><name>{GPX_NAME}</name></metadata>'
+    header = f'<?xml version="1.0" encoding="UTF-8" standalone="no"?><gpx version="{GPX_VERSION}" creator="{GPX_CREATOR_NAME}"><metadata><name>{GPX_NAME}</name></metadata>'
+    body = "".join(_generate_gpx_entry(repeater=repeater) for repeater in repeaters)
 
-    for repeater in repeaters:
-        gpx += _generate_gpx_entry(repeater=repeater)
-
-    gpx += '</gpx>'
-
-    return gpx
+    return header + body + '</gpx>'
 
 def main():
     ap = argparse.ArgumentParser(description="MeshMapper Repeaters → GPX converter")